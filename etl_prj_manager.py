@@ -37,12 +37,35 @@ project_config:
     owner: "my-org-o-utente"
     origin_remote_name: "nome-progetto-esistente"
     visibility: "private"  # oppure "public"
+
+PERFORMANCE NOTES:
+
+  Il tempo di ogni modalita' e' dominato dalle chiamate HTTP verso
+  GitLab/GitHub (e dall'attesa dell'import), non dal calcolo locale: la
+  generazione di YAML/CSV costa millisecondi. L'unico punto CPU rilevante
+  e' il parsing di config.yml, gia' coperto da CSafeLoader e dalla cache
+  JSON (config.yml.cache.json).
+
+  Un'ottimizzazione va accettata solo se riduce almeno uno tra:
+    a) numero di chiamate HTTP (richieste condizionali, create senza GET, ...)
+    b) byte trasferiti (simple=True, iterator=True, 304 Not Modified, ...)
+    c) latenza seriale (sessione con keep-alive, letture in parallelo,
+       preparazione contenuti durante l'import)
+  Micro-ottimizzazioni del codice Python locale non sono prioritarie.
+
+  Dipendenza opzionale: orjson (se installato, usato per il JSON GitHub).
 """
 
+import csv
+import io
+import json
 import os
+import random
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from urllib.parse import quote
 
 import base64
@@ -53,18 +76,58 @@ import subprocess
 import tempfile
 import shutil
 from gitlab import exceptions as gl_ex
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # opzionale: encoding/decoding JSON piu' veloce
+except ImportError:
+    orjson = None
 
 
 # ----------------- Config -----------------
 
 
+def read_config_cached(cfg_path: str) -> dict:
+    """
+    Legge il YAML passando da una cache JSON accanto al file
+    (<cfg_path>.cache.json), valida finche' mtime e dimensione non cambiano.
+    """
+    cache_path = cfg_path + ".cache.json"
+    st = os.stat(cfg_path)
+    stamp = [st.st_mtime_ns, st.st_size]
+
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("stamp") == stamp:
+            return cached["config"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    # CSafeLoader (libyaml) se disponibile, altrimenti SafeLoader puro Python
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        cfg = yaml.load(f, Loader=loader) or {}
+
+    # la cache si scrive solo se il config sopravvive identico al round-trip
+    # JSON (niente date, chiavi non stringa, ...)
+    try:
+        if json.loads(json.dumps(cfg)) == cfg:
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump({"stamp": stamp, "config": cfg}, f)
+    except (OSError, TypeError, ValueError):
+        pass
+
+    return cfg
+
+
 def load_config(cfg_path: str = "config.yml") -> dict:
     if not os.path.exists(cfg_path):
         print(f"[ERRORE] File di configurazione '{cfg_path}' non trovato.")
         sys.exit(1)
 
-    with open(cfg_path, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
+    cfg = read_config_cached(cfg_path)
 
     for sec in ("agency_config", "project_config"):
         if sec not in cfg:
@@ -117,6 +180,14 @@ def require_env_var(key: str) -> str:
     sys.exit(1)
 
 
+def backoff_delay(attempt: int, base_sec: float, max_sec: float = 30) -> float:
+    """
+    Attesa tra due polling: cresce del 50% a ogni tentativo (fino a max_sec)
+    piu' un jitter casuale fino a 0.5s.
+    """
+    return min(max_sec, base_sec * (1.5 ** attempt)) + random.uniform(0, 0.5)
+
+
 # ----------------- GitLab utility -----------------
 
 
@@ -130,10 +201,17 @@ def init_gitlab_client(gitlab_url: str, token: str):
         sys.exit(1)
 
 
-def list_group_projects(gl_client, group_id: int):
+def list_group_projects(gl_client, group_id: int, search: str = None):
     try:
-        group = gl_client.groups.get(group_id)
-        return group.projects.list(all=True)
+        # with_projects=False: evita di farsi restituire l'elenco progetti
+        # completo insieme ai dati del gruppo
+        group = gl_client.groups.get(group_id, with_projects=False)
+        params = {"simple": True, "per_page": 100}
+        if search:
+            params["search"] = search
+        # iterator=True: le pagine successive vengono scaricate solo se
+        # l'iterazione ci arriva (la prima e' gia' richiesta qui)
+        return group.projects.list(iterator=True, **params)
     except Exception as e:
         print("[ERRORE] Impossibile ottenere progetti dal gruppo:", e)
         sys.exit(1)
@@ -151,17 +229,20 @@ def build_auth_url(http_url: str, username: str, token: str) -> str:
 
 
 def find_origin_project(gl_client, group_id: int, origin_name: str):
-    projects = list_group_projects(gl_client, group_id)
-    proj_by_name = {p.name.strip().lower(): p for p in projects}
-    chosen = proj_by_name.get(origin_name.strip().lower())
-    if not chosen:
-        print(f"[ERRORE] Il progetto sorgente '{origin_name}' non esiste nel gruppo GitLab.")
-        sys.exit(1)
-    return chosen
+    target = origin_name.strip().lower()
+    # filtro lato server per nome; il match esatto resta case-insensitive
+    for p in list_group_projects(gl_client, group_id, search=origin_name.strip()):
+        if p.name.strip().lower() == target:
+            return p
+    print(f"[ERRORE] Il progetto sorgente '{origin_name}' non esiste nel gruppo GitLab.")
+    sys.exit(1)
+
+
+PROJECT_SUFFIX_RE = re.compile(r"([A-Za-z0-9]+-[A-Za-z0-9]+)$")
 
 
 def derive_new_project_name(origin_name: str, new_suffix: str) -> str:
-    m = re.search(r"([A-Za-z0-9]+-[A-Za-z0-9]+)$", origin_name)
+    m = PROJECT_SUFFIX_RE.search(origin_name)
     if not m:
         print("[ERRORE] Il progetto sorgente non termina con un suffisso tipo AAA-BB.")
         sys.exit(1)
@@ -192,8 +273,9 @@ def create_gitlab_project_from_import(
         sys.exit(1)
 
 
-def wait_for_gitlab_import(gl_client, project_id: int, timeout_sec: int = 180, poll_sec: int = 5):
+def wait_for_gitlab_import(gl_client, project_id: int, timeout_sec: int = 180, poll_sec: float = 1):
     deadline = time.time() + timeout_sec
+    attempt = 0
     while True:
         proj = gl_client.projects.get(project_id)
         status = getattr(proj, "import_status", None)
@@ -206,10 +288,35 @@ def wait_for_gitlab_import(gl_client, project_id: int, timeout_sec: int = 180, p
         if time.time() > deadline:
             print("[ERRORE] Import GitLab non completato nei tempi previsti.")
             sys.exit(1)
-        time.sleep(poll_sec)
+        time.sleep(backoff_delay(attempt, poll_sec))
+        attempt += 1
 
 
-def upsert_gitlab_file(proj, file_path: str, content: str, branch: str, commit_message: str):
+def upsert_gitlab_file(
+    proj,
+    file_path: str,
+    content: str,
+    branch: str,
+    commit_message: str,
+    known_missing: bool = False,
+):
+    # known_missing: il file quasi certamente non esiste (progetto appena
+    # creato), quindi si tenta subito la create risparmiando la GET
+    if known_missing:
+        try:
+            proj.files.create(
+                {
+                    "file_path": file_path,
+                    "branch": branch,
+                    "content": content,
+                    "commit_message": commit_message,
+                }
+            )
+            return
+        except gl_ex.GitlabCreateError as e:
+            if "already exists" not in str(e):
+                raise
+
     try:
         f = proj.files.get(file_path=file_path, ref=branch)
         f.content = content
@@ -228,14 +335,52 @@ def upsert_gitlab_file(proj, file_path: str, content: str, branch: str, commit_m
 # ----------------- GitHub utility -----------------
 
 
+def build_github_session() -> requests.Session:
+    """
+    Sessione HTTP condivisa per le chiamate a api.github.com: riusa le
+    connessioni TLS (keep-alive) invece di aprirne una nuova per ogni richiesta
+    e ritenta in automatico gli errori transitori (429/5xx) con backoff.
+    """
+    # anche POST/PUT/PATCH: se il tentativo fallito era in realta' andato a
+    # buon fine, il retry fallisce con un errore esplicito (es. repo gia'
+    # esistente), che e' lo stesso esito di non ritentare affatto
+    retries = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=["GET", "PUT", "POST", "PATCH"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries))
+    return session
+
+
+GITHUB_SESSION = build_github_session()
+
+
 def github_headers(token: str) -> dict:
     return {
         "Authorization": f"Bearer {token}",
         "Accept": "application/vnd.github+json",
+        "Content-Type": "application/json",
         "X-GitHub-Api-Version": "2022-11-28",
     }
 
 
+def json_body(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def response_json(resp):
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+
 def create_github_repo(token: str, owner: str, repo_name: str, private: bool = True) -> dict:
     headers = github_headers(token)
     payload = {"name": repo_name, "private": private, "auto_init": False}
@@ -243,24 +388,24 @@ def create_github_repo(token: str, owner: str, repo_name: str, private: bool = T
     # 1) tenta come organizzazione (se owner specificato)
     if owner:
         url_org = f"https://api.github.com/orgs/{owner}/repos"
-        resp_org = requests.post(url_org, headers=headers, json=payload, timeout=30)
+        resp_org = GITHUB_SESSION.post(url_org, headers=headers, data=json_body(payload), timeout=30)
         if resp_org.status_code < 300:
-            return resp_org.json()
+            return response_json(resp_org)
         # se l'owner non è un'org o non abbiamo permessi, provo come utente
         if resp_org.status_code != 404:
-            detail = resp_org.json() if resp_org.content else {}
+            detail = response_json(resp_org) if resp_org.content else {}
             print("[ERRORE] Creazione repository GitHub fallita (org):", detail)
             sys.exit(1)
 
     # 2) fallback: crea sul profilo utente associato al token
     url_user = "https://api.github.com/user/repos"
-    resp_user = requests.post(url_user, headers=headers, json=payload, timeout=30)
+    resp_user = GITHUB_SESSION.post(url_user, headers=headers, data=json_body(payload), timeout=30)
     if resp_user.status_code >= 300:
-        detail = resp_user.json() if resp_user.content else {}
+        detail = response_json(resp_user) if resp_user.content else {}
         print("[ERRORE] Creazione repository GitHub fallita (utente):", detail)
         sys.exit(1)
 
-    return resp_user.json()
+    return response_json(resp_user)
 
 
 def start_github_import(
@@ -280,83 +425,120 @@ def start_github_import(
         "vcs_password": vcs_password,
     }
 
-    resp = requests.put(url, headers=headers, json=payload, timeout=30)
+    resp = GITHUB_SESSION.put(url, headers=headers, data=json_body(payload), timeout=30)
 
     if resp.status_code not in {201, 202}:
-        detail = resp.json() if resp.content else {}
+        detail = response_json(resp) if resp.content else {}
         # 404 con messaggio di deprecazione: gestito a monte
         raise RuntimeError(f"IMPORT_FAILED:{detail}")
 
-    return resp.json()
+    return response_json(resp)
 
 
 def set_github_default_branch(token: str, owner: str, repo_name: str, branch: str):
     headers = github_headers(token)
     url = f"https://api.github.com/repos/{owner}/{repo_name}"
-    resp = requests.patch(url, headers=headers, json={"default_branch": branch}, timeout=30)
+    resp = GITHUB_SESSION.patch(url, headers=headers, data=json_body({"default_branch": branch}), timeout=30)
     if resp.status_code >= 300:
         print("[WARNING] Impossibile impostare il default branch su GitHub:", resp.text)
 
 
-def wait_for_github_import(token: str, owner: str, repo_name: str, timeout_sec: int = 180, poll_sec: int = 5):
+def wait_for_github_import(token: str, owner: str, repo_name: str, timeout_sec: int = 180, poll_sec: float = 1):
     headers = github_headers(token)
     url = f"https://api.github.com/repos/{owner}/{repo_name}/import"
     deadline = time.time() + timeout_sec
+    etag = None
+    attempt = 0
     while True:
-        resp = requests.get(url, headers=headers, timeout=30)
+        # richiesta condizionale: un 304 non consuma rate limit
+        req_headers = {**headers, "If-None-Match": etag} if etag else headers
+        resp = GITHUB_SESSION.get(url, headers=req_headers, timeout=30)
         if resp.status_code >= 400:
             print("[ERRORE] Lettura stato import GitHub fallita:", resp.text)
             sys.exit(1)
-        data = resp.json()
-        status = data.get("status")
-        if status in {"imported", "complete", None}:
-            return data
-        if status == "error":
-            print("[ERRORE] Import GitHub fallito:", data)
-            sys.exit(1)
+        if resp.status_code != 304:
+            etag = resp.headers.get("ETag")
+            data = response_json(resp)
+            status = data.get("status")
+            if status in {"imported", "complete", None}:
+                return data
+            if status == "error":
+                print("[ERRORE] Import GitHub fallito:", data)
+                sys.exit(1)
         if time.time() > deadline:
             print("[ERRORE] Import GitHub non completato nei tempi previsti.")
             sys.exit(1)
-        time.sleep(poll_sec)
+        time.sleep(backoff_delay(attempt, poll_sec))
+        attempt += 1
 
 
 def github_repo_exists(token: str, owner: str, repo_name: str) -> dict:
     headers = github_headers(token)
     url = f"https://api.github.com/repos/{owner}/{repo_name}"
-    resp = requests.get(url, headers=headers, timeout=30)
+    resp = GITHUB_SESSION.get(url, headers=headers, timeout=30)
     if resp.status_code == 404:
         return {}
     if resp.status_code >= 400:
         print("[ERRORE] Verifica repo origine GitHub fallita:", resp.text)
         sys.exit(1)
-    return resp.json()
+    return response_json(resp)
 
 
-def upsert_github_file(token: str, owner: str, repo: str, path: str, content: str, message: str, branch: str):
+@lru_cache(maxsize=32)
+def encode_github_content(content: str) -> str:
+    # i file utente hanno spesso lo stesso contenuto: si codifica una volta sola
+    return base64.b64encode(content.encode("utf-8")).decode("ascii")
+
+
+def get_github_file_sha(token: str, owner: str, repo: str, path: str, branch: str):
     headers = github_headers(token)
-    url_get = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-    resp_get = requests.get(url_get, headers=headers, params={"ref": branch}, timeout=30)
-    sha = None
-    if resp_get.status_code == 200:
-        sha = resp_get.json().get("sha")
-    elif resp_get.status_code not in (404,):
-        print("[ERRORE] Lettura file GitHub fallita:", resp_get.text)
+    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+    resp = GITHUB_SESSION.get(url, headers=headers, params={"ref": branch}, timeout=30)
+    if resp.status_code == 200:
+        return response_json(resp).get("sha")
+    if resp.status_code not in (404,):
+        print("[ERRORE] Lettura file GitHub fallita:", resp.text)
         sys.exit(1)
+    return None
+
 
+def put_github_file(token: str, owner: str, repo: str, path: str, content: str, message: str, branch: str, sha=None):
+    headers = github_headers(token)
+    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
     payload = {
         "message": message,
-        "content": base64.b64encode(content.encode("utf-8")).decode("ascii"),
+        "content": encode_github_content(content),
         "branch": branch,
     }
     if sha:
         payload["sha"] = sha
 
-    resp_put = requests.put(url_get, headers=headers, json=payload, timeout=30)
-    if resp_put.status_code >= 300:
-        print("[ERRORE] Scrittura file GitHub fallita:", resp_put.text)
+    resp = GITHUB_SESSION.put(url, headers=headers, data=json_body(payload), timeout=30)
+    if resp.status_code >= 300:
+        print("[ERRORE] Scrittura file GitHub fallita:", resp.text)
         sys.exit(1)
 
 
+def upsert_github_file(token: str, owner: str, repo: str, path: str, content: str, message: str, branch: str):
+    sha = get_github_file_sha(token, owner, repo, path, branch)
+    put_github_file(token, owner, repo, path, content, message, branch, sha)
+
+
+def upsert_github_files(token: str, owner: str, repo: str, files: list, branch: str, max_workers: int = 8):
+    """
+    Scrive piu' file (path, content, message) sullo stesso branch.
+    Le letture degli sha sono indipendenti e vanno in parallelo; le scritture
+    restano sequenziali perche' PUT concorrenti sulla Contents API dello
+    stesso branch vanno in conflitto (409).
+    """
+    if not files:
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        shas = list(ex.map(lambda f: get_github_file_sha(token, owner, repo, f[0], branch), files))
+    for (path, content, message), sha in zip(files, shas):
+        put_github_file(token, owner, repo, path, content, message, branch, sha)
+
+
 def mirror_repo_via_git(token: str, source_url: str, target_owner: str, target_repo: str):
     """
     Usa git --mirror per copiare il repo sorgente nel nuovo repo target.
@@ -379,250 +561,186 @@ def mirror_repo_via_git(token: str, source_url: str, target_owner: str, target_r
 # ----------------- Generation utility -----------------
 
 
+REGISTER_HEADERS = (
+    "profileName",
+    "picture",
+    "fiscalCode",
+    "vatNumber",
+    "birthDate",
+    "gender",
+    "studioAddress",
+    "studioEmail",
+    "studioPec",
+    "studioPecReginde",
+    "studioPhone",
+    "studioFax",
+    "residenceAddress",
+    "residenceEmail",
+    "residencePec",
+    "residencePecReginde",
+    "residencePhone",
+    "residenceFax",
+    "professionalDomicileAddress",
+    "professionalDomicileEmail",
+    "professionalDomicilePec",
+    "professionalDomicilePecReginde",
+    "professionalDomicilePhone",
+    "professionalDomicileFax",
+    "taxDomicileAddress",
+    "taxDomicileEmail",
+    "taxDomicilePec",
+    "taxDomicilePecReginde",
+    "taxDomicilePhone",
+    "taxDomicileFax",
+    "mailingAddressAddress",
+    "mailingAddressEmail",
+    "mailingAddressPec",
+    "mailingAddressPecReginde",
+    "mailingAddressPhone",
+    "mailingAddressFax",
+    "studioMobilePhone",
+    "residenceMobilePhone",
+    "professionalDomicileMobilePhone",
+    "taxDomicileMobilePhone",
+    "mailingAddressMobilePhone",
+)
+
+# per AOO e UO le intestazioni coincidono con i suffissi delle chiavi nel config
+# (es. aoo1_name -> name)
+AOO_HEADERS = (
+    "accountable_email",
+    "accountable_first_name",
+    "accountable_last_name",
+    "accountable_phone_number",
+    "alboclassic_aoo_id",
+    "date_creation",
+    "name",
+    "unicode",
+)
+
+UO_HEADERS = (
+    "accountable_first_name",
+    "accountable_second_name",
+    "alboclassic_uo_id",
+    "albosmart_uo_id",
+    "date_creation",
+    "isDefault",
+    "name",
+    "unicode",
+)
+
+
+def build_csv_content(headers, rows) -> str:
+    """
+    CSV con separatore ';' e tutti i campi tra doppi apici.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=";", quoting=csv.QUOTE_ALL, lineterminator="\n")
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
 def ensure_settings_path(file_name: str) -> str:
     return f"settings/{file_name}"
 
 
+def render_user_yaml(agency_cfg: dict) -> str:
+    # il contenuto dipende solo da agency_config: e' identico per tutti gli utenti
+    content_lines = [
+        f"agency_ipa_code: '{agency_cfg['agency_ipa_code']}'",
+        "db_host_name: ''",
+        "db_name: ''",
+        "db_port_number: ''",
+        "db_pwd: ''",
+        "db_username: ''",
+        "delay_write_and_read_table_procedure: 150",
+        f"professional_category_id: {agency_cfg['category_id']}",
+        "root_path_global_common_transformation: ''",
+        "root_path_unioncol: ''",
+        "root_prj_folder: ''",
+        f"short_name: '{agency_cfg['short_name_template']}'",
+    ]
+    return "\n".join(content_lines) + "\n"
+
+
 def create_user_yaml_files(proj, branch: str, agency_cfg: dict, users_cfg: dict):
     users = ensure_users(users_cfg)
+    content = render_user_yaml(agency_cfg)
     for username in users:
-        content_lines = [
-            f"agency_ipa_code: '{agency_cfg['agency_ipa_code']}'",
-            "db_host_name: ''",
-            "db_name: ''",
-            "db_port_number: ''",
-            "db_pwd: ''",
-            "db_username: ''",
-            "delay_write_and_read_table_procedure: 150",
-            f"professional_category_id: {agency_cfg['category_id']}",
-            "root_path_global_common_transformation: ''",
-            "root_path_unioncol: ''",
-            "root_prj_folder: ''",
-            f"short_name: '{agency_cfg['short_name_template']}'",
-        ]
-        file_path = ensure_settings_path(f"{username}_etlSetting.yml")
         upsert_gitlab_file(
             proj,
-            file_path,
-            "\n".join(content_lines) + "\n",
+            ensure_settings_path(f"{username}_etlSetting.yml"),
+            content,
             branch,
             "Aggiungi configurazioni utente",
+            known_missing=True,
         )
 
 
 def create_register_csv(proj, branch: str, register_cfg: dict):
-    template = register_cfg.get("default_privacy_template", {}) if isinstance(register_cfg, dict) else {}
-    headers = [
-        "profileName",
-        "picture",
-        "fiscalCode",
-        "vatNumber",
-        "birthDate",
-        "gender",
-        "studioAddress",
-        "studioEmail",
-        "studioPec",
-        "studioPecReginde",
-        "studioPhone",
-        "studioFax",
-        "residenceAddress",
-        "residenceEmail",
-        "residencePec",
-        "residencePecReginde",
-        "residencePhone",
-        "residenceFax",
-        "professionalDomicileAddress",
-        "professionalDomicileEmail",
-        "professionalDomicilePec",
-        "professionalDomicilePecReginde",
-        "professionalDomicilePhone",
-        "professionalDomicileFax",
-        "taxDomicileAddress",
-        "taxDomicileEmail",
-        "taxDomicilePec",
-        "taxDomicilePecReginde",
-        "taxDomicilePhone",
-        "taxDomicileFax",
-        "mailingAddressAddress",
-        "mailingAddressEmail",
-        "mailingAddressPec",
-        "mailingAddressPecReginde",
-        "mailingAddressPhone",
-        "mailingAddressFax",
-        "studioMobilePhone",
-        "residenceMobilePhone",
-        "professionalDomicileMobilePhone",
-        "taxDomicileMobilePhone",
-        "mailingAddressMobilePhone",
-    ]
-
-    def val(key: str):
-        v = template.get(key)
-        return "" if v is None else str(v)
-
-    row = [val(h) for h in headers]
-
-    csv_lines = [
-        ";".join([f'"{h}"' for h in headers]),
-        ";".join([f'"{v}"' for v in row]),
-    ]
-
-    file_path = ensure_settings_path("privacy_default_template.csv")
     upsert_gitlab_file(
         proj,
-        file_path,
-        "\n".join(csv_lines) + "\n",
+        ensure_settings_path("privacy_default_template.csv"),
+        build_register_csv_content(register_cfg),
         branch,
         "Aggiungi template privacy",
+        known_missing=True,
     )
 
 
 def build_register_csv_content(register_cfg: dict) -> str:
     template = register_cfg.get("default_privacy_template", {}) if isinstance(register_cfg, dict) else {}
-    headers = [
-        "profileName",
-        "picture",
-        "fiscalCode",
-        "vatNumber",
-        "birthDate",
-        "gender",
-        "studioAddress",
-        "studioEmail",
-        "studioPec",
-        "studioPecReginde",
-        "studioPhone",
-        "studioFax",
-        "residenceAddress",
-        "residenceEmail",
-        "residencePec",
-        "residencePecReginde",
-        "residencePhone",
-        "residenceFax",
-        "professionalDomicileAddress",
-        "professionalDomicileEmail",
-        "professionalDomicilePec",
-        "professionalDomicilePecReginde",
-        "professionalDomicilePhone",
-        "professionalDomicileFax",
-        "taxDomicileAddress",
-        "taxDomicileEmail",
-        "taxDomicilePec",
-        "taxDomicilePecReginde",
-        "taxDomicilePhone",
-        "taxDomicileFax",
-        "mailingAddressAddress",
-        "mailingAddressEmail",
-        "mailingAddressPec",
-        "mailingAddressPecReginde",
-        "mailingAddressPhone",
-        "mailingAddressFax",
-        "studioMobilePhone",
-        "residenceMobilePhone",
-        "professionalDomicileMobilePhone",
-        "taxDomicileMobilePhone",
-        "mailingAddressMobilePhone",
-    ]
-
-    def val(key: str):
-        v = template.get(key)
-        return "" if v is None else str(v)
+    return build_csv_content(REGISTER_HEADERS, [tuple(template.get(h) for h in REGISTER_HEADERS)])
 
-    row = [val(h) for h in headers]
 
-    csv_lines = [
-        ";".join([f'"{h}"' for h in headers]),
-        ";".join([f'"{v}"' for v in row]),
-    ]
-    return "\n".join(csv_lines) + "\n"
+def extract_numbered_rows(section: dict, entry_name: str, fields) -> list:
+    """
+    Righe per le voci <entry_name>1..N di una sezione (es. AOO1, AOO2),
+    le cui chiavi hanno il prefisso <entry_name minuscolo><i>_ (es. aoo1_name).
+    """
+    num = int(section.get("number", 0) or 0)
+    key_prefix = entry_name.lower()
+    rows = []
+    for i in range(1, num + 1):
+        entry = section.get(f"{entry_name}{i}") or {}
+        if not entry:
+            print(f"[WARNING] Voce '{entry_name}{i}' mancante o vuota: riga con campi vuoti.")
+        prefix = f"{key_prefix}{i}_"
+        # i None restano tali: csv.writer li scrive gia' come stringa vuota
+        rows.append(tuple(entry.get(prefix + field) for field in fields))
+    return rows
 
 
 def extract_aoo_rows(protocol_cfg: dict):
     aoo_section = protocol_cfg.get("AOO", {}) if isinstance(protocol_cfg, dict) else {}
-    num = int(aoo_section.get("number", 0) or 0)
-    rows = []
-    headers = [
-        "accountable_email",
-        "accountable_first_name",
-        "accountable_last_name",
-        "accountable_phone_number",
-        "alboclassic_aoo_id",
-        "date_creation",
-        "name",
-        "unicode",
-    ]
-    for i in range(1, num + 1):
-        entry = aoo_section.get(f"AOO{i}", {})
-        row = [
-            entry.get(f"aoo{i}_accountable_email", ""),
-            entry.get(f"aoo{i}_accountable_first_name", ""),
-            entry.get(f"aoo{i}_accountable_last_name", ""),
-            entry.get(f"aoo{i}_accountable_phone_number", ""),
-            entry.get(f"aoo{i}_alboclassic_aoo_id", ""),
-            entry.get(f"aoo{i}_date_creation", ""),
-            entry.get(f"aoo{i}_name", ""),
-            entry.get(f"aoo{i}_unicode", ""),
-        ]
-        rows.append(["" if v is None else v for v in row])
-    return headers, rows
+    return AOO_HEADERS, extract_numbered_rows(aoo_section, "AOO", AOO_HEADERS)
 
 
 def extract_uo_rows(protocol_cfg: dict):
     uo_section = protocol_cfg.get("UO", {}) if isinstance(protocol_cfg, dict) else {}
-    num = int(uo_section.get("number", 0) or 0)
-    rows = []
-    headers = [
-        "accountable_first_name",
-        "accountable_second_name",
-        "alboclassic_uo_id",
-        "albosmart_uo_id",
-        "date_creation",
-        "isDefault",
-        "name",
-        "unicode",
-    ]
-    for i in range(1, num + 1):
-        entry = uo_section.get(f"UO{i}", {})
-        row = [
-            entry.get(f"uo{i}_accountable_first_name", ""),
-            entry.get(f"uo{i}_accountable_second_name", ""),
-            entry.get(f"uo{i}_alboclassic_uo_id", ""),
-            entry.get(f"uo{i}_albosmart_uo_id", ""),
-            entry.get(f"uo{i}_date_creation", ""),
-            entry.get(f"uo{i}_isDefault", ""),
-            entry.get(f"uo{i}_name", ""),
-            entry.get(f"uo{i}_unicode", ""),
-        ]
-        rows.append(["" if v is None else v for v in row])
-    return headers, rows
+    return UO_HEADERS, extract_numbered_rows(uo_section, "UO", UO_HEADERS)
 
 
 def create_protocol_csvs(proj, branch: str, protocol_cfg: dict):
-    aoo_headers, aoo_rows = extract_aoo_rows(protocol_cfg)
-    if aoo_rows:
-        csv_lines = [
-            ";".join([f'"{h}"' for h in aoo_headers]),
-            *[";".join([f'"{v}"' for v in row]) for row in aoo_rows],
-        ]
+    aoo_content, uo_content = build_protocol_csv_contents(protocol_cfg)
+    if aoo_content:
         upsert_gitlab_file(
             proj,
             ensure_settings_path("AOO.csv"),
-            "\n".join(csv_lines) + "\n",
+            aoo_content,
             branch,
             "Aggiungi CSV AOO",
+            known_missing=True,
         )
-
-    uo_headers, uo_rows = extract_uo_rows(protocol_cfg)
-    if uo_rows:
-        csv_lines = [
-            ";".join([f'"{h}"' for h in uo_headers]),
-            *[";".join([f'"{v}"' for v in row]) for row in uo_rows],
-        ]
+    if uo_content:
         upsert_gitlab_file(
             proj,
             ensure_settings_path("UO.csv"),
-            "\n".join(csv_lines) + "\n",
+            uo_content,
             branch,
             "Aggiungi CSV UO",
+            known_missing=True,
         )
 
 
@@ -630,25 +748,43 @@ def build_protocol_csv_contents(protocol_cfg: dict):
     aoo_headers, aoo_rows = extract_aoo_rows(protocol_cfg)
     uo_headers, uo_rows = extract_uo_rows(protocol_cfg)
 
-    aoo_content = ""
-    if aoo_rows:
-        aoo_lines = [
-            ";".join([f'"{h}"' for h in aoo_headers]),
-            *[";".join([f'"{v}"' for v in row]) for row in aoo_rows],
-        ]
-        aoo_content = "\n".join(aoo_lines) + "\n"
-
-    uo_content = ""
-    if uo_rows:
-        uo_lines = [
-            ";".join([f'"{h}"' for h in uo_headers]),
-            *[";".join([f'"{v}"' for v in row]) for row in uo_rows],
-        ]
-        uo_content = "\n".join(uo_lines) + "\n"
-
+    aoo_content = build_csv_content(aoo_headers, aoo_rows) if aoo_rows else ""
+    uo_content = build_csv_content(uo_headers, uo_rows) if uo_rows else ""
     return aoo_content, uo_content
 
 
+def build_settings_files(cfg: dict, users: list, submode: str) -> list:
+    """
+    Elenco (path, content, message) dei file da scrivere in settings/.
+    """
+    user_yaml_content = render_user_yaml(cfg["agency_config"])
+    files = [
+        (
+            ensure_settings_path(f"{username}_etlSetting.yml"),
+            user_yaml_content,
+            "Aggiungi configurazioni utente",
+        )
+        for username in users
+    ]
+
+    if submode == "register":
+        files.append(
+            (
+                ensure_settings_path("privacy_default_template.csv"),
+                build_register_csv_content(cfg.get("register_config", {})),
+                "Aggiungi template privacy",
+            )
+        )
+    else:
+        aoo_content, uo_content = build_protocol_csv_contents(cfg.get("protocol_config", {}))
+        if aoo_content:
+            files.append((ensure_settings_path("AOO.csv"), aoo_content, "Aggiungi CSV AOO"))
+        if uo_content:
+            files.append((ensure_settings_path("UO.csv"), uo_content, "Aggiungi CSV UO"))
+
+    return files
+
+
 # ----------------- Mode handlers -----------------
 
 
@@ -676,12 +812,12 @@ def mode_ls_remote_prj_github(cfg: dict, github_token: str):
 
     headers = github_headers(github_token)
     url = f"https://api.github.com/orgs/{github_owner}/repos"
-    resp = requests.get(url, headers=headers, params={"per_page": 100}, timeout=30)
+    resp = GITHUB_SESSION.get(url, headers=headers, params={"per_page": 100}, timeout=30)
     if resp.status_code >= 300:
         print("[ERRORE] Impossibile ottenere i repository GitHub:", resp.text)
         sys.exit(1)
 
-    repos = resp.json()
+    repos = response_json(resp)
     print(f"Repository per owner {github_owner}:")
     for r in repos:
         print(" -", r.get("name"))
@@ -767,6 +903,7 @@ def mode_create_remote_prj_github(cfg: dict, github_token: str, submode: str):
     default_branch = proj_cfg.get("git_default_branch", "main")
 
     github_private = github_cfg.get("visibility", "private").lower() != "public"
+    users = ensure_users(cfg.get("users", {}))
 
     # verifica se il repo di destinazione esiste già
     if github_repo_exists(github_token, github_owner, new_project_name):
@@ -782,89 +919,34 @@ def mode_create_remote_prj_github(cfg: dict, github_token: str, submode: str):
 
     repo_owner = created_repo.get("owner", {}).get("login", github_owner)
 
-    # Import diretto via API; se deprecato, fallback mirror git
-    try:
-        start_github_import(
-            github_token,
-            repo_owner,
-            new_project_name,
-            origin_repo_url,
-            repo_owner,
-            github_token,
-        )
-        wait_for_github_import(github_token, repo_owner, new_project_name)
-    except RuntimeError as err:
-        msg = str(err)
-        if "IMPORT_FAILED" in msg:
-            print("[INFO] Import API non disponibile, uso mirror git...")
-            mirror_repo_via_git(github_token, origin_repo_url, repo_owner, new_project_name)
-        else:
-            raise
-
-    set_github_default_branch(github_token, repo_owner, new_project_name, default_branch)
-
-    # Preparazione contenuti
-    users_cfg = cfg.get("users", {})
-    users = ensure_users(users_cfg)
-    register_csv_content = build_register_csv_content(cfg.get("register_config", {}))
-    aoo_content, uo_content = build_protocol_csv_contents(cfg.get("protocol_config", {}))
-
-    for username in users:
-        content_lines = [
-            f"agency_ipa_code: '{agency_cfg['agency_ipa_code']}'",
-            "db_host_name: ''",
-            "db_name: ''",
-            "db_port_number: ''",
-            "db_pwd: ''",
-            "db_username: ''",
-            "delay_write_and_read_table_procedure: 150",
-            f"professional_category_id: {agency_cfg['category_id']}",
-            "root_path_global_common_transformation: ''",
-            "root_path_unioncol: ''",
-            "root_prj_folder: ''",
-            f"short_name: '{agency_cfg['short_name_template']}'",
-        ]
-        upsert_github_file(
-            github_token,
-            repo_owner,
-            new_project_name,
-            ensure_settings_path(f"{username}_etlSetting.yml"),
-            "\n".join(content_lines) + "\n",
-            "Aggiungi configurazioni utente",
-            default_branch,
-        )
+    # Preparazione contenuti in parallelo all'import, che e' solo attesa di rete
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        files_future = ex.submit(build_settings_files, cfg, users, submode)
 
-    if submode == "register":
-        upsert_github_file(
-            github_token,
-            repo_owner,
-            new_project_name,
-            ensure_settings_path("privacy_default_template.csv"),
-            register_csv_content,
-            "Aggiungi template privacy",
-            default_branch,
-        )
-    else:
-        if aoo_content:
-            upsert_github_file(
+        # Import diretto via API; se deprecato, fallback mirror git
+        try:
+            start_github_import(
                 github_token,
                 repo_owner,
                 new_project_name,
-                ensure_settings_path("AOO.csv"),
-                aoo_content,
-                "Aggiungi CSV AOO",
-                default_branch,
-            )
-        if uo_content:
-            upsert_github_file(
-                github_token,
+                origin_repo_url,
                 repo_owner,
-                new_project_name,
-                ensure_settings_path("UO.csv"),
-                uo_content,
-                "Aggiungi CSV UO",
-                default_branch,
+                github_token,
             )
+            wait_for_github_import(github_token, repo_owner, new_project_name)
+        except RuntimeError as err:
+            msg = str(err)
+            if "IMPORT_FAILED" in msg:
+                print("[INFO] Import API non disponibile, uso mirror git...")
+                mirror_repo_via_git(github_token, origin_repo_url, repo_owner, new_project_name)
+            else:
+                raise
+
+        files = files_future.result()
+
+    set_github_default_branch(github_token, repo_owner, new_project_name, default_branch)
+
+    upsert_github_files(github_token, repo_owner, new_project_name, files, default_branch)
 
     print("Creato progetto GitHub:", created_repo.get("html_url"))
     print("Operazione completata su GitHub.")